@@ -1,5 +1,5 @@
 import argparse
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import os
 
 
@@ -34,6 +34,32 @@ class Config:
     IoTDB database name
     """
 
+    pool_size: int = 5
+    """
+    Maximum number of pooled IoTDB sessions (and worker threads serving them)
+    """
+
+    max_rows: int = 10000
+    """
+    Maximum number of result rows returned for a single query
+    """
+
+    resource_cache_ttl: float = 10.0
+    """
+    Seconds to serve list_resources from cache before re-querying the
+    schema; 0 disables caching
+    """
+
+    node_urls: list[str] = field(default_factory=list)
+    """
+    IoTDB node URLs (host:port); listing every node of a cluster lets the
+    session pool spread its connections across them
+    """
+
+    def __post_init__(self):
+        if not self.node_urls:
+            self.node_urls = [f"{self.host}:{self.port}"]
+
     @staticmethod
     def from_env_arguments() -> "Config":
         """
@@ -76,6 +102,34 @@ class Config:
             default=os.getenv("IOTDB_PASSWORD", "root"),
         )
 
+        parser.add_argument(
+            "--pool_size",
+            type=int,
+            help="IoTDB session pool size",
+            default=os.getenv("IOTDB_POOL_SIZE", 5),
+        )
+
+        parser.add_argument(
+            "--max_rows",
+            type=int,
+            help="Maximum number of result rows returned for a single query",
+            default=os.getenv("IOTDB_MAX_ROWS", 10000),
+        )
+
+        parser.add_argument(
+            "--resource_cache_ttl",
+            type=float,
+            help="Seconds to cache the resource list (0 disables)",
+            default=os.getenv("IOTDB_RESOURCE_CACHE_TTL", 10.0),
+        )
+
+        parser.add_argument(
+            "--nodes",
+            type=str,
+            help="Comma-separated IoTDB node URLs (host:port); overrides --host/--port",
+            default=os.getenv("IOTDB_NODES", ""),
+        )
+
         args = parser.parse_args()
         return Config(
             host=args.host,
@@ -83,4 +137,8 @@ class Config:
             database=args.database,
             user=args.user,
             password=args.password,
+            pool_size=args.pool_size,
+            max_rows=args.max_rows,
+            resource_cache_ttl=args.resource_cache_ttl,
+            node_urls=[url.strip() for url in args.nodes.split(",") if url.strip()],
         )
\ No newline at end of file
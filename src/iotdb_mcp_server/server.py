@@ -3,7 +3,16 @@ from iotdb_mcp_server.utils import security_gate, templates_loader
 from iotdb.table_session_pool import TableSessionPool, TableSessionPoolConfig
 
 import asyncio
+import atexit
+import csv
+import io
 import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property
 from logging import Logger
 from mcp.server import Server
 from mcp.types import (
@@ -20,12 +29,8 @@ from pydantic import AnyUrl
 RES_PREFIX = "iotdb://"
 # Resource query results limit
 RESULTS_LIMIT = 100
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
-
+# Valid table identifier; keeps URI segments out of raw SQL interpolation
+_TABLE_RE = re.compile(r"\A[A-Za-z_][A-Za-z0-9_]{0,127}\Z")
 
 # The IoTDB MCP Server
 class DatabaseServer:
@@ -33,6 +38,15 @@ class DatabaseServer:
         """Initialize the IoTDB MCP server"""
         self.app = Server("iotdb_mcp_server")
         self.logger = logger
+        # Per-request info logs go through a handler without %(asctime)s,
+        # which costs a strftime per record; errors keep the full format
+        hot_logger = logging.getLogger("iotdb_mcp_server.hot")
+        if not hot_logger.handlers:
+            handler = logging.StreamHandler()
+            handler.setFormatter(logging.Formatter("%(levelname)s %(name)s %(message)s"))
+            hot_logger.addHandler(handler)
+            hot_logger.propagate = False
+        self.hot_logger = hot_logger
         self.db_config = {
             "host": config.host,
             "port": config.port,
@@ -41,8 +55,41 @@ class DatabaseServer:
             "database": config.database,
         }
         self.templates = templates_loader()
+        # Hard cap on rows serialized per query; call_tool runs arbitrary
+        # user SQL and must not materialize unbounded result sets
+        self._max_rows = config.max_rows
+        # MCP clients enumerate resources in quick bursts; serve repeats from
+        # a short-TTL cache instead of re-running SHOW TABLES each time
+        self._resource_cache_ttl = config.resource_cache_ttl
+        self._resources_cache: tuple[float, list[Resource]] | None = None
+        # Tools and prompts are pure functions of startup state; build their
+        # payloads once instead of revalidating Pydantic models per call
+        self._tools_cache = [
+            Tool(
+                name="execute_sql",
+                description="Execute SQL query against IoTDB. Please use MySQL dialect when generating SQL queries.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "query": {
+                            "type": "string",
+                            "description": "The SQL query to execute (using MySQL dialect)",
+                        }
+                    },
+                    "required": ["query"],
+                },
+            )
+        ]
+        self._prompts_cache = [
+            Prompt(
+                name=name,
+                description=template["config"]["description"],
+                arguments=template["config"]["arguments"],
+            )
+            for name, template in self.templates.items()
+        ]
 
-        self.logger.info(f"IoTDB Config: {self.db_config}")
+        self.logger.info("IoTDB Config: %s", self.db_config)
 
         # Register callbacks
         self.app.list_resources()(self.list_resources)
@@ -51,96 +98,240 @@ class DatabaseServer:
         self.app.get_prompt()(self.get_prompt)
         self.app.list_tools()(self.list_tools)
         self.app.call_tool()(self.call_tool)
-        session_pool_config = TableSessionPoolConfig(
-            node_urls=[str(config.host) + ":" + str(config.port)],
+        self._session_pool_config = TableSessionPoolConfig(
+            node_urls=config.node_urls,
             username=config.user,
             password=config.password,
             database= None if len(config.database) == 0 else config.database,
+            max_pool_size=config.pool_size,
         )
-        self.session_pool = TableSessionPool(session_pool_config)
+        # The iotdb session API is blocking; run it off the event loop, with
+        # no more workers than there are pooled sessions
+        self._pool_size = config.pool_size
+        self._io_executor = ThreadPoolExecutor(max_workers=config.pool_size)
+        # Bounds in-flight DB work so concurrent submissions cannot exhaust
+        # the session pool and queue up behind each other in the executor
+        self._db_semaphore = asyncio.Semaphore(config.pool_size)
+        # Each worker thread keeps one session for its lifetime instead of
+        # paying pool acquire/release on every request
+        self._tls = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+        atexit.register(self._close_sessions)
+        # Sockets duplicated across fork() would be shared with the parent;
+        # make each forked worker open its own pool on first use instead
+        # (no-op on platforms without fork, e.g. Windows)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._reset_after_fork)
+
+    @cached_property
+    def session_pool(self) -> TableSessionPool:
+        """The session pool, created lazily on first use in each process."""
+        return TableSessionPool(self._session_pool_config)
+
+    def _reset_after_fork(self):
+        """Drop pool state inherited over fork so the child reconnects lazily."""
+        self.__dict__.pop("session_pool", None)
+        # The inherited executor still counts the parent's worker threads,
+        # which do not survive fork, so it would never spawn replacements
+        self._io_executor = ThreadPoolExecutor(max_workers=self._pool_size)
+        self._tls = threading.local()
+        self._sessions = []
+        self._sessions_lock = threading.Lock()
+
+    def _session(self):
+        """Return this worker thread's persistent session, opening it on first use."""
+        session = getattr(self._tls, "session", None)
+        if session is None:
+            session = self.session_pool.get_session()
+            self._tls.session = session
+            with self._sessions_lock:
+                self._sessions.append(session)
+        return session
+
+    def _discard_session(self):
+        """Return this thread's session to the pool after a failure.
+
+        For a pooled session close() is a put_back, not a real close, so the
+        session is re-queued rather than destroyed; if its transport broke,
+        the iotdb client reconnects internally on its next use. What this
+        buys us is that this thread stops pinning a suspect session and
+        starts fresh from the pool on its next request.
+        """
+        session = getattr(self._tls, "session", None)
+        if session is None:
+            return
+        self._tls.session = None
+        with self._sessions_lock:
+            if session in self._sessions:
+                self._sessions.remove(session)
+        try:
+            session.close()
+        except Exception:
+            pass
+
+    def _close_sessions(self):
+        """Release every persistent session at shutdown."""
+        with self._sessions_lock:
+            sessions, self._sessions = self._sessions, []
+        for session in sessions:
+            try:
+                session.close()
+            except Exception:
+                pass
+
+    def _execute_query(self, query: str):
+        """Run a query on this thread's session, releasing it on failure."""
+        try:
+            return self._session().execute_query_statement(query)
+        except Exception:
+            self._discard_session()
+            raise
+
+    async def _run_blocking(self, fn, *args):
+        """Run a blocking session call on the I/O executor."""
+        loop = asyncio.get_running_loop()
+        async with self._db_semaphore:
+            return await loop.run_in_executor(self._io_executor, fn, *args)
+
+    async def _gather_blocking(self, fns):
+        """Run independent blocking calls concurrently, bounded by the pool.
+
+        Handlers that need more than one query per request should map them
+        through here so their latency is the max, not the sum, of the parts.
+        """
+        return await asyncio.gather(*(self._run_blocking(fn) for fn in fns))
+
+    def _sync_list_tables(self) -> list[str]:
+        """Fetch the table names via a blocking SHOW TABLES query."""
+        tables = self._execute_query("SHOW TABLES")
+
+        names = []
+        # Hoist the per-iteration attribute lookups out of the loop
+        has_next = tables.has_next
+        next_row = tables.next
+        append = names.append
+        while has_next():
+            append(str(next_row().get_fields()[0]))
+        return names
 
     async def list_resources(self) -> list[Resource]:
         """List IoTDB tables as resources."""
 
-        table_session = self.session_pool.get_session()
-        tables = table_session.execute_query_statement("SHOW TABLES")
-
-        resources = []
-        while tables.has_next():
-            table = str(tables.next().get_fields()[0])
-            resources.append(
-                Resource(
-                    uri=f"{RES_PREFIX}{table}/data",
-                    name=f"Table: {table}",
-                    mimeType="text/plain",
-                    description=f"Data in table: {table}",
-                )
+        cached = self._resources_cache
+        if cached is not None and time.monotonic() - cached[0] < self._resource_cache_ttl:
+            return cached[1]
+
+        tables = await self._run_blocking(self._sync_list_tables)
+        resources = [
+            Resource(
+                uri=f"{RES_PREFIX}{table}/data",
+                name=f"Table: {table}",
+                mimeType="text/plain",
+                description=f"Data in table: {table}",
             )
-        table_session.close()
+            for table in tables
+        ]
+        self._resources_cache = (time.monotonic(), resources)
         return resources
 
     async def read_resource(self, uri: AnyUrl) -> str:
         """Read table contents."""
-        logger = self.logger
-
         uri_str = str(uri)
-        logger.info(f"Reading resource: {uri_str}")
+        self.hot_logger.info("Reading resource: %s", uri_str)
 
         if not uri_str.startswith(RES_PREFIX):
             raise ValueError(f"Invalid URI scheme: {uri_str}")
 
-        parts = uri_str[len(RES_PREFIX) :].split("/")
-        table = parts[0]
-
-        table_session = self.session_pool.get_session()
-        res = table_session.execute_query_statement(f"SELECT * FROM {table} LIMIT {RESULTS_LIMIT}")
+        table = uri_str.removeprefix(RES_PREFIX).partition("/")[0]
+        if not _TABLE_RE.match(table):
+            raise ValueError(f"Invalid table name: {table}")
+
+        return await self._run_blocking(self._sync_read_resource, table)
+
+    def _serialize_result(self, res) -> str:
+        """Serialize a result set to CSV text, one UTF-8 encode per batch."""
+        buf = bytearray()
+        header = io.StringIO()
+        csv.writer(header, lineterminator="\n").writerow(res.get_column_names())
+        buf += header.getvalue().encode("utf-8")
+        remaining = self._max_rows
+        truncated = False
+        next_df = getattr(res, "next_df", None)
+        if next_df is not None:
+            # Pull a full fetch-size batch per client call and let pandas
+            # format each batch column-wise in C instead of cell by cell
+            while True:
+                batch = next_df()
+                if batch is None:
+                    break
+                if len(batch) > remaining:
+                    batch = batch.iloc[:remaining]
+                    truncated = True
+                remaining -= len(batch)
+                buf += batch.to_csv(
+                    header=False, index=False, lineterminator="\n"
+                ).encode("utf-8")
+                if truncated:
+                    break
+        else:
+            # Clients as old as the declared 2.0.1b0 floor predate next_df;
+            # fall back to streaming the rows one by one
+            body = io.StringIO()
+            writerow = csv.writer(body, lineterminator="\n").writerow
+            has_next = res.has_next
+            next_row = res.next
+            while has_next():
+                if remaining == 0:
+                    truncated = True
+                    break
+                writerow(next_row().get_fields())
+                remaining -= 1
+            buf += body.getvalue().encode("utf-8")
+        if truncated:
+            # The abandoned query still holds unconsumed results server-side;
+            # release its operation handle instead of leaking one per
+            # truncated query on this long-lived session
+            try:
+                res.close_operation_handle()
+            except Exception:
+                pass
+            buf += f"-- output truncated at {self._max_rows} rows\n".encode("utf-8")
+        # MCP's TextContent only carries str, so decode the payload once here
+        return buf.decode("utf-8")
 
-        columns = res.get_column_names()
-        result = []
-        while res.has_next():
-            row = res.next().get_fields()
-            result.append(",".join(map(str, row)))
-        table_session.close()
-        return "\n".join([",".join(columns)] + result)
+    def _sync_read_resource(self, table: str) -> str:
+        """Blocking part of read_resource: query the table and serialize rows."""
+        res = self._execute_query(f"SELECT * FROM {table} LIMIT {RESULTS_LIMIT}")
+        return self._serialize_result(res)
 
 
     async def list_prompts(self) -> list[Prompt]:
         """List available IoTDB prompts."""
-        logger = self.logger
-
-        logger.info("Listing prompts...")
-        prompts = []
-        for name, template in self.templates.items():
-            logger.info(f"Found prompt: {name}")
-            prompts.append(
-                Prompt(
-                    name=name,
-                    description=template["config"]["description"],
-                    arguments=template["config"]["arguments"],
-                )
-            )
-        return prompts
+        self.hot_logger.info("Listing prompts...")
+        return self._prompts_cache
 
     async def get_prompt(
         self, name: str, arguments: dict[str, str] | None
     ) -> GetPromptResult:
         """Handle the get_prompt request."""
-        logger = self.logger
-
-        logger.info(f"Get prompt: {name}")
+        self.hot_logger.info("Get prompt: %s", name)
         if name not in self.templates:
-            logger.error(f"Unknown template: {name}")
+            self.logger.error("Unknown template: %s", name)
             raise ValueError(f"Unknown template: {name}")
 
         template = self.templates[name]
-        formatted_template = template["template"]
 
-        # Replace placeholders with arguments
+        # Fill the precompiled placeholder slots in a single pass
         if arguments:
-            for key, value in arguments.items():
-                formatted_template = formatted_template.replace(
-                    f"{{{{ {key} }}}}", value
-                )
+            literals, keys = template["compiled"]
+            out = [literals[0]]
+            for i, key in enumerate(keys):
+                out.append(arguments.get(key, ""))
+                out.append(literals[i + 1])
+            formatted_template = "".join(out)
+        else:
+            formatted_template = template["template"]
 
         return GetPromptResult(
             description=template["config"]["description"],
@@ -154,31 +345,12 @@ class DatabaseServer:
 
     async def list_tools(self) -> list[Tool]:
         """List available IoTDB tools."""
-        logger = self.logger
-
-        logger.info("Listing tools...")
-        return [
-            Tool(
-                name="execute_sql",
-                description="Execute SQL query against IoTDB. Please use MySQL dialect when generating SQL queries.",
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "query": {
-                            "type": "string",
-                            "description": "The SQL query to execute (using MySQL dialect)",
-                        }
-                    },
-                    "required": ["query"],
-                },
-            )
-        ]
+        self.hot_logger.info("Listing tools...")
+        return self._tools_cache
 
     async def call_tool(self, name: str, arguments: dict) -> list[TextContent]:
         """Execute SQL commands."""
-        logger = self.logger
-
-        logger.info(f"Calling tool: {name} with arguments: {arguments}")
+        self.hot_logger.info("Calling tool: %s with arguments: %s", name, arguments)
 
         if name != "execute_sql":
             raise ValueError(f"Unknown tool: {name}")
@@ -197,41 +369,35 @@ class DatabaseServer:
                 )
             ]
 
-        table_session = self.session_pool.get_session()
-        res = table_session.execute_query_statement(query)
+        text = await self._run_blocking(self._sync_execute_sql, query)
+        return [TextContent(type="text", text=text)]
 
+    def _sync_execute_sql(self, query: str) -> str:
+        """Blocking part of call_tool: execute the query and serialize rows."""
         stmt = query.strip().upper()
         # Special handling for SHOW TABLES
         if stmt.startswith("SHOW TABLES"):
+            res = self._execute_query(query)
             result = ["Tables_in_" + self.db_config["database"]]  # Header
-            while res.has_next():
-                result.append(str(res.next().get_fields()[0]))
-            table_session.close()
-            return [TextContent(type="text", text="\n".join(result))]
+            has_next = res.has_next
+            next_row = res.next
+            append = result.append
+            while has_next():
+                append(str(next_row().get_fields()[0]))
+            return "\n".join(result)
         # Regular SELECT queries
         elif stmt.startswith("SELECT") or stmt.startswith("DESCRIBE"):
+            res = self._execute_query(query)
+            return self._serialize_result(res)
 
-            columns = res.get_column_names()
-            result = []
-            while res.has_next():
-                row = res.next().get_fields()
-                result.append(",".join(map(str, row)))
-            table_session.close()
-            return [
-                TextContent(
-                    type="text",
-                    text="\n".join([",".join(columns)] + result),
-                )
-            ]
-
-        # Non-SELECT queries
+        # Unsupported statements are rejected before touching the session,
+        # so they cost no round trip and cannot have side effects
         else:
-            logger.error(f"Error executing SQL '{query}'")
-            return [TextContent(type="text", text=f"Error executing query")]
+            self.logger.error("Error executing SQL '%s'", query)
+            return "Error executing query"
 
     async def run(self):
         """Run the MCP server."""
-        logger = self.logger
         from mcp.server.stdio import stdio_server
 
         async with stdio_server() as (read_stream, write_stream):
@@ -240,12 +406,19 @@ class DatabaseServer:
                     read_stream, write_stream, self.app.create_initialization_options()
                 )
             except Exception as e:
-                logger.error(f"Server error: {str(e)}", exc_info=True)
+                self.logger.error("Server error: %s", e, exc_info=True)
                 raise
 
 
 async def main(config: Config):
     """Main entry point to run the MCP server."""
+    # Configure logging only when running as a server, and only if the host
+    # application has not already installed its own handlers
+    if not logging.getLogger().handlers:
+        logging.basicConfig(
+            level=logging.INFO,
+            format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+        )
     logger = logging.getLogger("iotdb_mcp_server")
     db_server = DatabaseServer(logger, config)
 
@@ -5,6 +5,19 @@ import os
 
 logger = logging.getLogger("greptimedb_mcp_server")
 
+# Matches `{{ key }}` placeholders in prompt templates
+_PLACEHOLDER_RE = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+
+# Dangerous operations with the reason reported when blocked; compiled once
+# into a single alternation so security_gate scans the query only once
+_DANGEROUS_OPERATIONS = {
+    "DROP": "Forbided `DROP` operation",
+    "DELETE": "Forbided `DELETE` operation",
+    "REVOKE": "Forbided `REVOKE` operation",
+    "TRUNCATE": "Forbided `bTRUNCATE` operation",
+}
+_DANGER_RE = re.compile(r"\b(" + "|".join(_DANGEROUS_OPERATIONS) + r")\s")
+
 
 def security_gate(query: str) -> tuple[bool, str]:
     """
@@ -19,23 +32,16 @@ def security_gate(query: str) -> tuple[bool, str]:
     # format query to uppercase and remove leading/trailing whitespace
     normalized_query = query.strip().upper()
 
-    # Define dangerous patterns
-    dangerous_patterns = [
-        (r"\bDROP\s", "Forbided `DROP` operation"),
-        (r"\bDELETE\s", "Forbided `DELETE` operation"),
-        (r"\bREVOKE\s", "Forbided `REVOKE` operation"),
-        (r"\bTRUNCATE\s", "Forbided `bTRUNCATE` operation"),
-    ]
-
-    for pattern, reason in dangerous_patterns:
-        if re.search(pattern, normalized_query):
-            logger.warning(f"Detected dangerous operation: '{query}' - {reason}")
-            return True, reason
+    match = _DANGER_RE.search(normalized_query)
+    if match:
+        reason = _DANGEROUS_OPERATIONS[match.group(1)]
+        logger.warning(f"Detected dangerous operation: '{query}' - {reason}")
+        return True, reason
 
     return False, ""
 
 
-def templates_loader() -> dict[str, dict[str, str]]:
+def templates_loader() -> dict[str, dict]:
     templates = {}
     template_dir = os.path.join(os.path.dirname(__file__), "..", "..", "templates")
 
@@ -50,6 +56,13 @@ def templates_loader() -> dict[str, dict[str, str]]:
             with open(os.path.join(category_path, "template.md"), "r") as f:
                 template = f.read()
 
-            templates[category] = {"config": config, "template": template}
+            # Split the template into literal chunks and placeholder keys once,
+            # so rendering is a single join instead of one scan per argument
+            parts = _PLACEHOLDER_RE.split(template)
+            templates[category] = {
+                "config": config,
+                "template": template,
+                "compiled": (parts[0::2], parts[1::2]),
+            }
 
     return templates
\ No newline at end of file